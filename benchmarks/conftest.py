@@ -0,0 +1,4 @@
+def pytest_configure(config):
+    config.addinivalue_line("markers", "size_small: benchmark input smaller than 64KB")
+    config.addinivalue_line("markers", "size_medium: benchmark input between 64KB and 4MB")
+    config.addinivalue_line("markers", "size_large: benchmark input of 4MB or more")
@@ -1,36 +1,195 @@
+import os
+import bz2
+import mmap
 import gzip
+import lzma
+import zlib
 import pytest
 import cramjam
 import pathlib
+import time
+import functools
+import contextlib
+import importlib
+import collections
 import numpy as np
 
 
+def optional_import(name):
+    """
+    Import a third party library to benchmark against, or None if it's not installed.
+    Implementations depending on it are then skipped, see `ref(...)` and `parametrize_impls(...)`
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def ref(module, name):
+    """
+    `module.name`, or None if the module isn't installed
+    """
+    return None if module is None else getattr(module, name)
+
+
+blosc2 = optional_import("blosc2")
+snappy = optional_import("snappy")
+igzip = optional_import("isal.igzip")
+isal_zlib = optional_import("isal.isal_zlib")
+frame = optional_import("lz4.frame")
+block = optional_import("lz4.block")
+brotli = optional_import("brotli")
+zstd = optional_import("zstd")
+
+
 if hasattr(cramjam, 'experimental') and not hasattr(cramjam, 'blosc2'):
     cramjam.blosc2 = cramjam.experimental.blosc2
 
 
+@pytest.fixture(scope="session", autouse=True)
+def warmup():
+    """
+    Make a first call into each cramjam variant before any timing starts
+    """
+    data = b"oh what a beautiful morning, oh what a beautiful day!!" * 32
+    for variant in (
+        cramjam.snappy,
+        cramjam.gzip,
+        cramjam.deflate,
+        cramjam.lz4,
+        cramjam.zstd,
+        cramjam.brotli,
+        cramjam.bzip2,
+        cramjam.xz,
+    ):
+        variant.decompress(variant.compress(data))
+    if hasattr(cramjam, "blosc2"):
+        cramjam.blosc2.decompress_chunk(cramjam.blosc2.compress_chunk(data))
+
+
+def read_via_mmap(path: pathlib.Path):
+    """
+    Read a file's bytes through a read only memory map, rather than copying it into
+    an intermediate `bytes` with `read_bytes()`. Returns a context manager yielding
+    the map, which cramjam can read directly through the buffer protocol.
+    """
+    if path.stat().st_size == 0:  # can't map an empty file
+        return contextlib.nullcontext(b"")
+    with path.open("rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def aligned_empty(size: int, align: int = 64):
+    """
+    Uninitialized uint8 array of `size`, with its start aligned to `align` bytes
+    """
+    buffer = np.empty(size + align, dtype=np.uint8)
+    offset = -buffer.ctypes.data % align
+    return buffer[offset : offset + size]
+
+
+def aligned_copy(data, align: int = 64):
+    """
+    Read only copy of `data` into a buffer aligned to `align` bytes
+    """
+    buffer = aligned_empty(len(data), align)
+    buffer[:] = np.frombuffer(data, dtype=np.uint8)
+    buffer.flags.writeable = False
+    return buffer
+
+
+@functools.lru_cache(maxsize=None)
+def read_aligned(file):
+    """
+    Like `file.read_bytes()` but the data is aligned, for cramjam only benchmarks
+    where there is no third party lib which may want exactly `bytes` as input.
+    """
+    return aligned_copy(file.read_bytes())
+
+
+# Uncompressed sizes of the bundled files in data/, so they can be bucketed into
+# size marks during collection without decompressing them
+BUNDLED_SIZES = {
+    "Mark.Twain-Tom.Sawyer.txt": 14168,
+    "alice29.txt": 152089,
+    "asyoulik.txt": 125179,
+    "dickens": 10192446,
+    "fireworks.jpeg": 123093,
+    "geo.protodata": 118588,
+    "html": 102400,
+    "html_x_4": 409600,
+    "kppkn.gtb": 184320,
+    "lcet10.txt": 426754,
+    "mozilla": 51220480,
+    "mr": 9970564,
+    "nci": 33553445,
+    "ooffice": 6152192,
+    "osdb": 10085684,
+    "paper-100k.pdf": 102400,
+    "plrabn12.txt": 481861,
+    "reymont": 6627202,
+    "samba": 21606400,
+    "sao": 7251944,
+    "urls.10K": 702087,
+    "webster": 41458703,
+    "x-ray": 8474240,
+    "xml": 5345280,
+}
+
+
 class Bzip2CompressedFile:
     """
     Too bad can't just inherit pathlib.Path
 
-    Simple wrapper to decompress benchmark file on read_bytes()
+    Simple wrapper to decompress benchmark file on read_bytes(), the
+    decompressed bytes are cached so each file is only decompressed once.
     """
     def __init__(self, path: pathlib.Path ):
         self.path = path
+        self._data = None
 
     @property
     def name(self):
         return self.path.name.replace('.bz2', '')
 
+    @property
+    def size(self):
+        if self.name in BUNDLED_SIZES:
+            return BUNDLED_SIZES[self.name]
+        return len(self.read_bytes())
+
     def read_bytes(self):
-        return cramjam.bzip2.decompress(self.path.read_bytes()).read()
+        if self._data is None:
+            with read_via_mmap(self.path) as compressed:
+                self._data = cramjam.bzip2.decompress(compressed).read()
+            # Catch BUNDLED_SIZES going stale when a file in data/ is replaced
+            assert self.name not in BUNDLED_SIZES or len(self._data) == BUNDLED_SIZES[self.name]
+        return self._data
+
+
+class CorpusFile:
+    """
+    Uncompressed file from an external corpus given by the CRAMJAM_BENCH_CORPUS
+    directory, read once and cached. Named `corpus/<name>` so it can't clash with
+    a bundled file of the same name.
+    """
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self._data = None
+
+    @property
+    def name(self):
+        return f"corpus/{self.path.name}"
 
+    @property
+    def size(self):
+        return self.path.stat().st_size
 
-FILES = [
-    Bzip2CompressedFile(f)
-    for f in pathlib.Path(__file__).parent.joinpath("data").iterdir()
-    if f.is_file() and f.name != "COPYING"
-]
+    def read_bytes(self):
+        if self._data is None:
+            self._data = self.path.read_bytes()
+        return self._data
 
 
 class FiftyFourMbRepeating:
@@ -39,9 +198,14 @@ class FiftyFourMbRepeating:
     """
 
     name = "fifty-four-mb-repeating"
+    size = 54000000
+    _data = None
 
     def read_bytes(self):
-        return b"oh what a beautiful morning, oh what a beautiful day!!" * 1000000
+        # Cached on the class, shared by all instances
+        if FiftyFourMbRepeating._data is None:
+            FiftyFourMbRepeating._data = b"oh what a beautiful morning, oh what a beautiful day!!" * 1000000
+        return FiftyFourMbRepeating._data
 
 
 class FiftyFourMbRandom:
@@ -50,304 +214,331 @@ class FiftyFourMbRandom:
     """
 
     name = "fifty-four-mb-random"
+    size = 54000000
+    _data = None
 
     def read_bytes(self):
-        return np.random.randint(0, 255, size=54000000, dtype=np.uint8).tobytes()
+        # Cached on the class, shared by all instances
+        if FiftyFourMbRandom._data is None:
+            FiftyFourMbRandom._data = os.urandom(54000000)
+        return FiftyFourMbRandom._data
 
 
-FILES.extend([FiftyFourMbRepeating(), FiftyFourMbRandom()])
+@functools.lru_cache(maxsize=None)
+def discover_files():
+    """
+    Benchmark files, only scanned for once the first test needing them is collected
+    """
+    files = [
+        Bzip2CompressedFile(f)
+        for f in pathlib.Path(__file__).parent.joinpath("data").iterdir()
+        if f.is_file() and f.name != "COPYING"
+    ]
+    corpus = os.getenv("CRAMJAM_BENCH_CORPUS")
+    if corpus:
+        files.extend(CorpusFile(f) for f in sorted(pathlib.Path(corpus).iterdir()) if f.is_file())
+    return (*files, FiftyFourMbRepeating(), FiftyFourMbRandom())
+
+
+# Benchmark and file combinations taking many seconds per round while giving
+# little useful signal, only ran with --run-slow
+SLOW = {
+    "test_brotli": (FiftyFourMbRandom, FiftyFourMbRepeating),
+    "test_bzip2": (FiftyFourMbRandom,),
+    "test_lzma": (FiftyFourMbRandom,),
+}
+
+
+def size_category(file):
+    """
+    Bucket a file by size: 'small' (< 64KB), 'medium' (< 4MB) or 'large'.
+    Benchmarks get a matching `size_<category>` mark, ie. `-m "not size_large"`
+    """
+    if file.size < 64 * 1024:
+        return "small"
+    elif file.size < 4 * 1024 * 1024:
+        return "medium"
+    return "large"
+
 
+def pytest_generate_tests(metafunc):
+    if "file" in metafunc.fixturenames:
+        slow = SLOW.get(metafunc.function.__name__, ())
+        files = []
+        for f in discover_files():
+            marks = [getattr(pytest.mark, f"size_{size_category(f)}")]
+            if isinstance(f, slow):
+                marks.append(pytest.mark.slow)
+            files.append(pytest.param(f, marks=marks))
+        metafunc.parametrize("file", files, ids=lambda val: val.name)
 
-def round_trip(compress, decompress, data, **kwargs):
-    return decompress(compress(data, **kwargs))
 
-@pytest.mark.parametrize(
-    "use_cramjam", (True, False), ids=lambda val: "cramjam" if val else "blosc2"
+# Roughly how long, in seconds, each benchmark should spend on its timed rounds
+ROUNDS_BUDGET = 2.0
+
+
+def pedantic(benchmark, fn, *args, **kwargs):
+    """
+    Benchmark `fn(*args, **kwargs)`, skipping pytest-benchmark's calibration which
+    can take several seconds by itself on the largest inputs. The warmup call is
+    timed to pick the number of rounds fitting `ROUNDS_BUDGET`, between 3 and 100.
+    """
+    if benchmark.disabled:
+        benchmark.pedantic(fn, args=args, kwargs=kwargs)
+        return
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    rounds = max(3, min(100, int(ROUNDS_BUDGET // max(elapsed, 1e-9))))
+    benchmark.pedantic(fn, args=args, kwargs=kwargs, rounds=rounds, iterations=1)
+
+
+# An implementation of a codec to benchmark.
+# `output_len=True` (cramjam) passes the known output sizes as `output_len`.
+# If `compress_into`/`decompress_into` are set (cramjam), those are benchmarked
+# instead, writing into a preallocated buffer of `max_compressed_len(data)`
+# when compressing, or of `len(data)` when decompressing.
+# `level_kwarg` is the name of the compression level kwarg, for benchmarks sweeping levels.
+Impl = collections.namedtuple(
+    "Impl",
+    (
+        "name",
+        "compress",
+        "decompress",
+        "compress_kwargs",
+        "output_len",
+        "compress_into",
+        "decompress_into",
+        "max_compressed_len",
+        "level_kwarg",
+    ),
+    defaults=({}, False, None, None, None, None),
 )
-@pytest.mark.parametrize("file", FILES, ids=lambda val: val.name)
-def test_blosc2(benchmark, file, use_cramjam: bool):
+
+
+def parametrize_impls(*impls):
     """
-    Uses snappy compression raw
+    Parametrize `impl` with the given `Impl`s, skipping those not available.
+    """
+    return pytest.mark.parametrize(
+        "impl",
+        [
+            pytest.param(
+                impl,
+                id=impl.name,
+                marks=pytest.mark.skipif(impl.compress is None, reason=f"{impl.name} not available"),
+            )
+            for impl in impls
+        ],
+    )
+
+
+def bench(benchmark, op, impl, data, output_buffer, level=None):
     """
-    import blosc2
+    Benchmark only one direction, `op`, of de/compression with `impl`.
 
-    data = file.read_bytes()
-    if use_cramjam:
-        benchmark(
-            round_trip,
-            compress=cramjam.blosc2.compress_chunk,
-            decompress=cramjam.blosc2.decompress_chunk,
-            data=data,
-        )
+    When benchmarking decompression or for `output_len=True`, the data is compressed
+    once up front, outside of the timing, as the decompression input. For
+    `output_len=True`, the sizes from that are passed as `output_len` so output buffers are allocated
+    once at the right size, instead of being over allocated and resized on every call.
+    """
+    compress_kwargs = dict(impl.compress_kwargs)
+    if level is not None:
+        compress_kwargs[impl.level_kwarg] = level
+    decompress_kwargs = {}
+    if op == "decompress" or impl.output_len:
+        compressed = bytes(impl.compress(data, **compress_kwargs))
+    if impl.output_len:
+        compress_kwargs["output_len"] = len(compressed)
+        decompress_kwargs["output_len"] = len(data)
+
+    if op == "compress":
+        if impl.compress_into is not None:
+            pedantic(benchmark, impl.compress_into, data, output_buffer(impl.max_compressed_len(data)))
+        else:
+            pedantic(benchmark, impl.compress, data, **compress_kwargs)
     else:
-        benchmark(
-            round_trip,
-            compress=blosc2.compress,
-            decompress=blosc2.decompress,
-            data=data,
-        )
-
-@pytest.mark.parametrize(
-    "use_cramjam", (True, False), ids=lambda val: "cramjam" if val else "snappy"
-)
-@pytest.mark.parametrize("file", FILES, ids=lambda val: val.name)
-def test_snappy_raw(benchmark, file, use_cramjam: bool):
+        if impl.decompress_into is not None:
+            pedantic(benchmark, impl.decompress_into, compressed, output_buffer(len(data)))
+        else:
+            pedantic(benchmark, impl.decompress, compressed, **decompress_kwargs)
+
+
+@pytest.fixture(scope="session")
+def output_buffer():
     """
-    Uses snappy compression raw
+    Uninitialized, aligned output buffer shared across benchmarks, only
+    reallocated when a larger one than seen before is requested.
     """
-    import snappy
+    buffer = np.empty(0, dtype=np.uint8)
 
-    data = file.read_bytes()
-    if use_cramjam:
-        benchmark(
-            round_trip,
-            compress=cramjam.snappy.compress_raw,
-            decompress=cramjam.snappy.decompress_raw,
-            data=data,
-        )
-    else:
-        benchmark(
-            round_trip,
-            compress=snappy.compress,
-            decompress=snappy.decompress,
-            data=data,
-        )
+    def get(size: int):
+        nonlocal buffer
+        if size > len(buffer):
+            buffer = aligned_empty(size)
+        return buffer[:size]
 
+    return get
 
-@pytest.mark.parametrize(
-    "use_cramjam", (True, False), ids=lambda val: "cramjam" if val else "snappy"
-)
-@pytest.mark.parametrize("file", FILES, ids=lambda val: val.name)
-def test_snappy_framed(benchmark, file, use_cramjam: bool):
+
+@pytest.fixture(scope="session")
+def snappy_compressed():
     """
-    Uses snappy compression framed
+    Snappy framed compressed, aligned bytes of each file, computed once and shared
+    by both the compress_into and decompress_into benchmarks.
     """
-    import snappy
+    cache = {}
 
-    data = bytearray(file.read_bytes())
-    if use_cramjam:
-        benchmark(
-            round_trip,
-            compress=cramjam.snappy.compress,
-            decompress=cramjam.snappy.decompress,
-            data=data,
-        )
-    else:
-        compressor = snappy.StreamCompressor()
-        decompressor = snappy.StreamDecompressor()
-        benchmark(
-            round_trip,
-            compress=compressor.compress,
-            decompress=decompressor.decompress,
-            data=data,
-        )
+    def get(file):
+        if file not in cache:
+            cache[file] = aligned_copy(cramjam.snappy.compress(file.read_bytes()))
+        return cache[file]
+
+    return get
 
 
 @pytest.mark.parametrize("op", ("decompress_into", "compress_into"))
-@pytest.mark.parametrize("file", FILES, ids=lambda val: val.name)
-def test_cramjam_snappy_de_compress_into(benchmark, op, file):
+def test_cramjam_snappy_de_compress_into(benchmark, op, file, output_buffer, snappy_compressed):
     """
     Uses decompress_into for snappy compression
     """
-    from cramjam import snappy
+    data = read_aligned(file)
+    compressed_data = snappy_compressed(file)
 
-    data = file.read_bytes()
-    compressed_data = bytes(cramjam.snappy.compress(data))
+    operation = getattr(cramjam.snappy, op)
+    buffer = output_buffer(len(data) if op == "decompress_into" else len(compressed_data))
 
-    operation = getattr(snappy, op)
-    buffer = np.zeros(
-        len(data) if op == "decompress_into" else len(compressed_data),
-        dtype=np.uint8,
-    )
-
-    benchmark(
-        lambda data, buffer: operation(data, buffer),
-        data=compressed_data if op == "decompress_into" else data,
-        buffer=buffer,
-    )
+    pedantic(benchmark, operation, compressed_data if op == "decompress_into" else data, buffer)
 
 
-@pytest.mark.parametrize("lib", ("gzip", "cramjam", "isal"), ids=lambda val: val)
-@pytest.mark.parametrize("file", FILES, ids=lambda val: val.name)
-def test_gzip(benchmark, file, lib):
-    from isal import igzip
-
-    data = file.read_bytes()
-    if lib == "cramjam":
-        benchmark(
-            round_trip,
-            compress=cramjam.gzip.compress,
-            decompress=cramjam.gzip.decompress,
-            data=data,
-            level=3,
-        )
-    elif lib == "gzip":
-        benchmark(
-            round_trip,
-            compress=gzip.compress,
-            decompress=gzip.decompress,
-            data=data,
-            compresslevel=3,
-        )
-    else:
-        benchmark(
-            round_trip,
-            compress=igzip.compress,
-            decompress=igzip.decompress,
-            data=data,
-            compresslevel=igzip._COMPRESS_LEVEL_BEST,  # 3
-        )
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+@parametrize_impls(
+    Impl(
+        "cramjam",
+        ref(getattr(cramjam, "blosc2", None), "compress_chunk"),
+        ref(getattr(cramjam, "blosc2", None), "decompress_chunk"),
+    ),
+    Impl("blosc2", ref(blosc2, "compress"), ref(blosc2, "decompress")),
+)
+def test_blosc2(benchmark, op, file, impl, output_buffer):
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer)
+
+
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+@parametrize_impls(
+    Impl(
+        "cramjam",
+        cramjam.snappy.compress_raw,
+        cramjam.snappy.decompress_raw,
+        compress_into=cramjam.snappy.compress_raw_into,
+        decompress_into=cramjam.snappy.decompress_raw_into,
+        max_compressed_len=cramjam.snappy.compress_raw_max_len,
+    ),
+    Impl("snappy", ref(snappy, "compress"), ref(snappy, "decompress")),
+)
+def test_snappy_raw(benchmark, op, file, impl, output_buffer):
+    """
+    Uses snappy compression raw
+    """
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer)
+
+
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+@parametrize_impls(
+    Impl("cramjam", cramjam.snappy.compress, cramjam.snappy.decompress, output_len=True),
+    # Fresh stream objects per call, otherwise state carries over between
+    # benchmark rounds, unlike cramjam's one-shot framed API.
+    Impl(
+        "snappy",
+        snappy and (lambda data: snappy.StreamCompressor().compress(data)),
+        snappy and (lambda data: snappy.StreamDecompressor().decompress(data)),
+    ),
+)
+def test_snappy_framed(benchmark, op, file, impl, output_buffer):
+    """
+    Uses snappy compression framed
+    """
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer)
 
 
-@pytest.mark.parametrize(
-    "use_cramjam", (True, False), ids=lambda val: "cramjam" if val else "python-lz4"
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+@parametrize_impls(
+    Impl("gzip", gzip.compress, gzip.decompress, dict(compresslevel=3)),
+    Impl("cramjam", cramjam.gzip.compress, cramjam.gzip.decompress, dict(level=3), output_len=True),
+    Impl("isal", ref(igzip, "compress"), ref(igzip, "decompress"), dict(compresslevel=3)),  # isal's best
 )
-@pytest.mark.parametrize("file", FILES, ids=lambda val: val.name)
-def test_lz4(benchmark, file, use_cramjam: bool):
-    from lz4 import frame
-
-    data = file.read_bytes()
-    if use_cramjam:
-        benchmark(
-            round_trip,
-            compress=cramjam.lz4.compress,
-            decompress=cramjam.lz4.decompress,
-            data=data,
-            level=4,
-        )
-    else:
-        benchmark(
-            round_trip,
-            compress=frame.compress,
-            decompress=frame.decompress,
-            data=data,
-            compression_level=4,
-        )
+def test_gzip(benchmark, op, file, impl, output_buffer):
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer)
 
 
-@pytest.mark.parametrize(
-    "use_cramjam", (True, False), ids=lambda val: "cramjam" if val else "python-lz4"
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+@parametrize_impls(
+    Impl("zlib", zlib.compress, zlib.decompress, dict(level=3)),
+    Impl("cramjam", cramjam.deflate.compress, cramjam.deflate.decompress, dict(level=3), output_len=True),
+    Impl("isal", ref(isal_zlib, "compress"), ref(isal_zlib, "decompress"), dict(level=3)),  # isal's best
 )
-@pytest.mark.parametrize("file", FILES, ids=lambda val: val.name)
-def test_lz4_block(benchmark, file, use_cramjam: bool):
-    from lz4 import block
-
-    data = file.read_bytes()
-    if use_cramjam:
-        benchmark(
-            round_trip,
-            compress=cramjam.lz4.compress_block,
-            decompress=cramjam.lz4.decompress_block,
-            data=data,
-        )
-    else:
-        benchmark(
-            round_trip,
-            compress=block.compress,
-            decompress=block.decompress,
-            data=data,
-        )
+def test_deflate(benchmark, op, file, impl, output_buffer):
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer)
 
 
-@pytest.mark.parametrize(
-    "use_cramjam", (True, False), ids=lambda val: "cramjam" if val else "brotli"
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+@parametrize_impls(
+    Impl("cramjam", cramjam.lz4.compress, cramjam.lz4.decompress, dict(level=4), output_len=True),
+    Impl("python-lz4", ref(frame, "compress"), ref(frame, "decompress"), dict(compression_level=4)),
 )
-@pytest.mark.parametrize(
-    "file",
-    [
-        f
-        for f in FILES
-        if not (isinstance(f, (FiftyFourMbRandom, FiftyFourMbRepeating)))
-    ],
-    ids=lambda val: val.name,
+def test_lz4(benchmark, op, file, impl, output_buffer):
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer)
+
+
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+@parametrize_impls(
+    Impl(
+        "cramjam",
+        cramjam.lz4.compress_block,
+        cramjam.lz4.decompress_block,
+        compress_into=cramjam.lz4.compress_block_into,
+        decompress_into=cramjam.lz4.decompress_block_into,
+        max_compressed_len=cramjam.lz4.compress_block_bound,
+    ),
+    Impl("python-lz4", ref(block, "compress"), ref(block, "decompress")),
 )
-def test_brotli(benchmark, file, use_cramjam: bool):
-    import brotli
-
-    data = file.read_bytes()
-    if use_cramjam:
-        benchmark(
-            round_trip,
-            compress=cramjam.brotli.compress,
-            decompress=cramjam.brotli.decompress,
-            data=data,
-        )
-    else:
-        benchmark(
-            round_trip,
-            compress=brotli.compress,
-            decompress=brotli.decompress,
-            data=data,
-        )
+def test_lz4_block(benchmark, op, file, impl, output_buffer):
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer)
 
 
-@pytest.mark.parametrize(
-    "use_cramjam", (True, False), ids=lambda val: "cramjam" if val else "zstd"
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+# 11 is the default for both, but often magnitudes slower than the rest
+@pytest.mark.parametrize("level", (1, 4, 6, pytest.param(11, marks=pytest.mark.slow)))
+@parametrize_impls(
+    Impl("cramjam", cramjam.brotli.compress, cramjam.brotli.decompress, output_len=True, level_kwarg="level"),
+    Impl("brotli", ref(brotli, "compress"), ref(brotli, "decompress"), level_kwarg="quality"),
 )
-@pytest.mark.parametrize("file", FILES, ids=lambda val: val.name)
-def test_zstd(benchmark, file, use_cramjam: bool):
-    import zstd
-
-    data = file.read_bytes()
-    if use_cramjam:
-        benchmark(
-            round_trip,
-            compress=cramjam.zstd.compress,
-            decompress=cramjam.zstd.decompress,
-            data=data,
-        )
-    else:
-        benchmark(
-            round_trip,
-            compress=zstd.compress,
-            decompress=zstd.decompress,
-            data=data,
-        )
+def test_brotli(benchmark, op, file, impl, level, output_buffer):
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer, level=level)
 
 
-@pytest.mark.parametrize(
-    "use_cramjam", (True, False), ids=lambda val: "cramjam" if val else "bzip2"
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+@parametrize_impls(
+    Impl("cramjam", cramjam.zstd.compress, cramjam.zstd.decompress, output_len=True),
+    Impl("zstd", ref(zstd, "compress"), ref(zstd, "decompress")),
 )
-@pytest.mark.parametrize("file", FILES, ids=lambda val: val.name)
-def test_bzip2(benchmark, file, use_cramjam: bool):
-    import bz2
-
-    data = file.read_bytes()
-    if use_cramjam:
-        benchmark(
-            round_trip,
-            compress=cramjam.bzip2.compress,
-            decompress=cramjam.bzip2.decompress,
-            data=data,
-        )
-    else:
-        benchmark(
-            round_trip,
-            compress=bz2.compress,
-            decompress=bz2.decompress,
-            data=data,
-        )
+def test_zstd(benchmark, op, file, impl, output_buffer):
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer)
 
 
-@pytest.mark.parametrize(
-    "use_cramjam", (True, False), ids=lambda val: "cramjam" if val else "lzma"
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+@parametrize_impls(
+    Impl("cramjam", cramjam.bzip2.compress, cramjam.bzip2.decompress, output_len=True),
+    Impl("bzip2", bz2.compress, bz2.decompress),
 )
-@pytest.mark.parametrize("file", FILES, ids=lambda val: val.name)
-def test_lzma(benchmark, file, use_cramjam: bool):
-    import lzma
-
-    data = file.read_bytes()
-    if use_cramjam:
-        benchmark(
-            round_trip,
-            compress=cramjam.experimental.lzma.compress,
-            decompress=cramjam.experimental.lzma.decompress,
-            data=data,
-        )
-    else:
-        benchmark(
-            round_trip,
-            compress=lzma.compress,
-            decompress=lzma.decompress,
-            data=data,
-        )
+def test_bzip2(benchmark, op, file, impl, output_buffer):
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer)
+
+
+@pytest.mark.parametrize("op", ("compress", "decompress"))
+@parametrize_impls(
+    Impl("cramjam", cramjam.xz.compress, cramjam.xz.decompress, output_len=True),
+    Impl("lzma", lzma.compress, lzma.decompress),
+)
+def test_lzma(benchmark, op, file, impl, output_buffer):
+    bench(benchmark, op, impl, file.read_bytes(), output_buffer)
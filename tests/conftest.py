@@ -6,3 +6,9 @@ import pytest
 def is_pypy():
     impl = platform.python_implementation()
     return impl.lower() == 'pypy'
+
+
+@pytest.fixture(scope='session')
+def tmp_dir(tmp_path_factory):
+    """One directory for the session; tests use unique file names within it"""
+    return tmp_path_factory.mktemp("tmp")
@@ -29,28 +29,52 @@ def variants(e):
             yield getattr(e, attr)
 
 
-@pytest.mark.parametrize("codec", variants(blosc2.Codec), ids=lambda v: str(v))
-@pytest.mark.parametrize("filter", variants(blosc2.Filter), ids=lambda v: str(v))
-@pytest.mark.parametrize("clevel", variants(blosc2.CLevel), ids=lambda v: str(v))
-@given(data=st_np.arrays(st_np.scalar_dtypes(), shape=st.integers(0, 10_000)))
+@pytest.fixture(scope="session")
+def scratch():
+    """Output space for the *_into tests, big enough for 10k elements of the widest dtype"""
+    return np.empty(2 * 1024 * 1024, dtype=np.uint8)
+
+
+# Plain numeric dtypes; blosc2 only sees the bytes and their typesize
+BYTE_SAFE_DTYPES = st.sampled_from(
+    [np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32, np.uint64, np.int64, np.float32, np.float64]
+)
+
+CODECS = list(variants(blosc2.Codec))
+FILTERS = list(variants(blosc2.Filter))
+
+# Levels share the same code path per codec, so no compression, the extremes
+# and a middle level cover them without sweeping all ten.
+CLEVELS = [blosc2.CLevel.Zero, blosc2.CLevel.One, blosc2.CLevel.Five, blosc2.CLevel.Nine]
+
+CODEC_IDS = [str(v) for v in CODECS]
+FILTER_IDS = [str(v) for v in FILTERS]
+CLEVEL_IDS = [str(v) for v in CLEVELS]
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=CODEC_IDS)
+@pytest.mark.parametrize("filter", FILTERS, ids=FILTER_IDS)
+@pytest.mark.parametrize("clevel", CLEVELS, ids=CLEVEL_IDS)
+@given(data=st_np.arrays(BYTE_SAFE_DTYPES, shape=st.integers(0, 10_000)))
 def test_roundtrip_chunk(data, codec, filter, clevel):
     compressed = blosc2.compress_chunk(data, clevel=clevel, filter=filter, codec=codec)
     decompressed = blosc2.decompress_chunk(compressed)
-    assert data.tobytes() == bytes(decompressed)
+    assert memoryview(data.view(np.uint8)) == memoryview(decompressed)
 
 
-@pytest.mark.parametrize("codec", variants(blosc2.Codec), ids=lambda v: str(v))
-@pytest.mark.parametrize("filter", variants(blosc2.Filter), ids=lambda v: str(v))
-@pytest.mark.parametrize("clevel", variants(blosc2.CLevel), ids=lambda v: str(v))
-@given(data=st_np.arrays(st_np.scalar_dtypes(), shape=st.integers(0, 10_000)))
-def test_roundtrip_chunk_into(data, codec, filter, clevel):
+@pytest.mark.parametrize("codec", CODECS, ids=CODEC_IDS)
+@pytest.mark.parametrize("filter", FILTERS, ids=FILTER_IDS)
+@pytest.mark.parametrize("clevel", CLEVELS, ids=CLEVEL_IDS)
+@given(data=st_np.arrays(BYTE_SAFE_DTYPES, shape=st.integers(0, 10_000)))
+def test_roundtrip_chunk_into(data, codec, filter, clevel, scratch):
     kwargs = dict(clevel=clevel, filter=filter, codec=codec)
     nbytes_compressed = len(blosc2.compress_chunk(data, **kwargs))
 
-    compressed = np.empty(blosc2.max_compressed_len(len(data.tobytes())), dtype=np.uint8)
+    max_compressed_len = blosc2.max_compressed_len(data.nbytes)
+    compressed = scratch[:max_compressed_len]
     nbytes = blosc2.compress_chunk_into(data, compressed, **kwargs)
 
-    decompressed = np.empty(len(data.tobytes()) * 2, dtype=np.uint8)
+    decompressed = scratch[max_compressed_len:max_compressed_len + data.nbytes * 2]
     nbytes = blosc2.decompress_chunk_into(compressed[:nbytes], decompressed)
-    assert nbytes == len(data.tobytes())
-    np.array_equal(data, np.frombuffer(decompressed[:nbytes], dtype=data.dtype))
+    assert nbytes == data.nbytes
+    assert np.array_equal(data, np.frombuffer(decompressed[:nbytes], dtype=data.dtype), equal_nan=True)
@@ -46,7 +46,7 @@ Variant = namedtuple("Variant", ("name", "suffix"))
 def test_variant(variant: Variant, integration_dir: pathlib.Path, plaintext: bytes):
     file = integration_dir.joinpath(f"plaintext.txt.{variant.suffix}")
     decompress = getattr(cramjam, variant.name).decompress
-    assert bytes(decompress(file.read_bytes())) == plaintext
+    assert same_same(decompress(file.read_bytes()), plaintext)
 
 
 @given(data=st.binary(min_size=1, max_size=int(1e6)))
@@ -56,12 +56,12 @@ def test_lzma_compat(data, format):
     # Decompress from std lzma lib
     compressed = lzma.compress(data, format=format)
     uncompressed = cramjam.xz.decompress(compressed)
-    assert same_same(bytes(uncompressed), data)
+    assert same_same(uncompressed, data)
 
     # std lzma lib can decompress us
     cjformat = (
         cramjam.xz.Format.ALONE if format == lzma.FORMAT_ALONE else cramjam.xz.Format.XZ
     )
     compressed = cramjam.xz.compress(data, format=cjformat)
-    uncompressed = lzma.decompress(bytes(compressed), format=format)
+    uncompressed = lzma.decompress(compressed, format=format)
     assert same_same(uncompressed, data)
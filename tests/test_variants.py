@@ -1,9 +1,12 @@
 import os
 import gzip
+import uuid
+import pathlib
+import platform
+import functools
 import pytest
 import numpy as np
 import cramjam
-import hashlib
 from datetime import timedelta
 from hypothesis import strategies as st, given, settings
 from hypothesis.extra import numpy as st_np
@@ -17,6 +20,41 @@ if not hasattr(cramjam, "blosc2") and hasattr(cramjam, "experimental"):
 if hasattr(cramjam, 'blosc2'):
     VARIANTS = (*VARIANTS, "blosc2")
 
+IS_PYPY = platform.python_implementation().lower() == "pypy"
+
+# Decided at collection, so PyPy doesn't set up these cases just to xfail them
+pypy_flaky_output = pytest.mark.xfail(
+    IS_PYPY, reason="PyPy de/compress_into w/ bytes or memoryview is a bit flaky behavior", run=False
+)
+
+# Each buffer type goes through the same conversion regardless of the type it's paired
+# with, so cover every type as both input and output rather than the full cross product,
+# plus every File/Buffer/other input-output branch of the Rust side.
+INTO_TYPE_PAIRS = (
+    pytest.param(bytes, bytes, marks=pypy_flaky_output),
+    (bytes, bytearray),
+    (bytearray, "numpy"),
+    pytest.param("numpy", memoryview, marks=pypy_flaky_output),
+    (cramjam.Buffer, cramjam.File),
+    (cramjam.File, cramjam.Buffer),
+    (memoryview, "numpy"),
+    ("numpy", cramjam.File),
+    (cramjam.File, cramjam.File),
+    (cramjam.File, bytearray),
+    ("numpy", cramjam.Buffer),
+    pytest.param(cramjam.Buffer, bytes, marks=pypy_flaky_output),
+)
+
+# The *_into tests check buffer handling, not codecs, so keep their payloads small
+INTO_PAYLOADS = st.binary(max_size=4096)
+
+# Bounded well below the 1MB `scratch` buffers used by the raw/block *_into tests,
+# their slices would otherwise silently come up short of the max compressed length
+RAW_INTO_PAYLOADS = st.binary(max_size=64 * 1024)
+
+# datetime64 / timedelta64 kinds, known to fail in PyPy for multidim buffer views
+PYPY_UNSUPPORTED_KINDS = frozenset("Mm")
+
 # Some OS can be slow or have higher variability in their runtimes on CI
 settings.register_profile("local", deadline=None, max_examples=20)
 settings.register_profile("CI", deadline=None, max_examples=10)
@@ -27,7 +65,63 @@ else:
 
 
 def same_same(a, b):
-    return hashlib.md5(a).hexdigest() == hashlib.md5(b).hexdigest()
+    # Views over either buffer, so neither side is copied just to be compared
+    return np.array_equal(np.frombuffer(a, dtype=np.uint8), np.frombuffer(b, dtype=np.uint8))
+
+
+# Roundtrips don't check compression ratio, so use each codec's fastest level;
+# brotli otherwise defaults to 11, by far its slowest setting.
+FAST_COMPRESS_KWARGS = {
+    "brotli": dict(level=1),
+    "bzip2": dict(level=1),
+    "deflate": dict(level=1),
+    "gzip": dict(level=1),
+    "zstd": dict(level=1),
+    "xz": dict(preset=0),
+}
+
+
+def fast_compress(variant_str, data):
+    return getattr(cramjam, variant_str).compress(data, **FAST_COMPRESS_KWARGS.get(variant_str, {}))
+
+
+@functools.lru_cache(maxsize=512)
+def compressed_bytes(variant_str, raw_data):
+    """Compressed output only depends on the variant and input, so share it across parametrizations"""
+    return bytes(fast_compress(variant_str, raw_data))
+
+
+@pytest.fixture(scope="module")
+def scratch_file(tmp_dir):
+    """
+    Returns a factory for emptied cramjam.File objects, one per name, reused across examples.
+    Backed by tmpfs where available.
+    """
+    shm = pathlib.Path("/dev/shm")
+    base = shm if shm.is_dir() else tmp_dir
+    files = {}
+
+    def get(name):
+        if name not in files:
+            path = base.joinpath(f"cramjam-{os.getpid()}-{name}.bin")
+            files[name] = (path, cramjam.File(str(path)))
+        file = files[name][1]
+        file.seek(0)
+        file.truncate()
+        return file
+
+    yield get
+
+    paths = [path for path, _ in files.values()]
+    files.clear()
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+@pytest.fixture(scope="module")
+def scratch():
+    """Compressed and decompressed output space for the raw/block *_into tests"""
+    return np.empty(1024 * 1024, dtype=np.uint8), np.empty(1024 * 1024, dtype=np.uint8)
 
 
 def test_has_version():
@@ -40,42 +134,40 @@ def test_has_version():
 @given(arr=st_np.arrays(st_np.scalar_dtypes(), shape=st.integers(0, int(1e4))))
 def test_variants_different_dtypes(variant_str, arr, is_pypy):
     variant = getattr(cramjam, variant_str)
-    compressed = variant.compress(arr)
+    compressed = fast_compress(variant_str, arr)
     decompressed = variant.decompress(compressed)
-    assert same_same(bytes(decompressed), arr.tobytes())
+    assert same_same(decompressed, arr)
 
     # And compress n dims > 1
     if arr.shape[0] % 2 == 0:
         arr = arr.reshape((2, -1))
 
-        if is_pypy:
+        if is_pypy and arr.dtype.kind in PYPY_UNSUPPORTED_KINDS:
+            pytest.xfail(reason="PyPy struggles w/ multidim buffer views depending on dtype ie datetime[64]")
+        elif is_pypy:
             try:
-                compressed = variant.compress(arr)
+                compressed = fast_compress(variant_str, arr)
             except:
                 pytest.xfail(reason="PyPy struggles w/ multidim buffer views depending on dtype ie datetime[64]")
         else:
-            compressed = variant.compress(arr)
+            compressed = fast_compress(variant_str, arr)
         decompressed = variant.decompress(compressed)
-        assert same_same(bytes(decompressed), arr.tobytes())
+        assert same_same(decompressed, arr)
 
 
-@pytest.mark.parametrize("is_bytearray", (True, False))
 @pytest.mark.parametrize("variant_str", VARIANTS)
 @given(uncompressed=st.binary(min_size=1))
-def test_variants_simple(variant_str, is_bytearray, uncompressed: bytes):
+def test_variants_simple(variant_str, uncompressed: bytes):
     variant = getattr(cramjam, variant_str)
 
-    if is_bytearray:
-        uncompressed = bytearray(uncompressed)
+    for data in (uncompressed, bytearray(uncompressed)):
+        compressed = fast_compress(variant_str, data)
+        assert len(compressed) != len(data) or bytes(compressed) != data
+        assert isinstance(compressed, cramjam.Buffer)
 
-    compressed = variant.compress(uncompressed)
-    assert compressed.read() != uncompressed
-    compressed.seek(0)
-    assert isinstance(compressed, cramjam.Buffer)
-
-    decompressed = variant.decompress(compressed, output_len=len(uncompressed))
-    assert same_same(decompressed.read(), uncompressed)
-    assert isinstance(decompressed, cramjam.Buffer)
+        decompressed = variant.decompress(compressed, output_len=len(data))
+        assert same_same(decompressed, data)
+        assert isinstance(decompressed, cramjam.Buffer)
 
 
 @pytest.mark.parametrize("variant_str", VARIANTS)
@@ -85,16 +177,11 @@ def test_variants_raise_exception(variant_str):
         variant.decompress(b"sknow")
 
 
-@pytest.mark.parametrize(
-    "input_type", (bytes, bytearray, "numpy", cramjam.Buffer, cramjam.File, memoryview)
-)
-@pytest.mark.parametrize(
-    "output_type", (bytes, bytearray, "numpy", cramjam.Buffer, cramjam.File, memoryview)
-)
+@pytest.mark.parametrize("input_type,output_type", INTO_TYPE_PAIRS)
 @pytest.mark.parametrize("variant_str", VARIANTS)
-@given(raw_data=st.binary())
+@given(raw_data=INTO_PAYLOADS)
 def test_variants_compress_into(
-    variant_str, input_type, output_type, raw_data, tmp_path_factory, is_pypy
+    variant_str, input_type, output_type, raw_data, scratch_file
 ):
     # TODO: Fix segfault when using blosc2 compress_into cramjam.File
     #       decompress_into appears to work fine.
@@ -109,9 +196,7 @@ def test_variants_compress_into(
     if input_type == "numpy":
         input = np.frombuffer(raw_data, dtype=np.uint8)
     elif input_type == cramjam.File:
-        path = tmp_path_factory.mktemp("tmp").joinpath("input.txt")
-        path.touch()
-        input = cramjam.File(str(path))
+        input = scratch_file("input")
         input.write(raw_data)
         input.seek(0)
     elif input_type == cramjam.Buffer:
@@ -121,59 +206,48 @@ def test_variants_compress_into(
     else:
         input = input_type(raw_data)
 
-    compressed = variant.compress(raw_data)
+    compressed = compressed_bytes(variant_str, raw_data)
     compressed_len = len(compressed)
 
     # Setup output buffer
     if output_type == "numpy":
         output = np.zeros(compressed_len, dtype=np.uint8)
     elif output_type == cramjam.File:
-        path = tmp_path_factory.mktemp("tmp").joinpath("output.txt")
-        path.touch()
-        output = cramjam.File(str(path))
+        output = scratch_file("output")
     elif output_type == cramjam.Buffer:
         output = cramjam.Buffer()
+    elif output_type == bytearray:
+        output = bytearray(compressed_len)
     else:
-        output = output_type(b"0" * compressed_len)
-
-    if is_pypy and isinstance(output, (bytes, memoryview)):
-        pytest.xfail(reason="PyPy de/compress_into w/ bytes or memoryview is a bit flaky behavior")
+        # Not b"0" * n: for n == 1 that's CPython's cached single byte object, and
+        # writing into it would change b"0" for the rest of the process.
+        output = output_type(bytes(compressed_len))
 
-    n_bytes = variant.compress_into(input, output)
+    n_bytes = variant.compress_into(input, output, **FAST_COMPRESS_KWARGS.get(variant_str, {}))
     assert n_bytes == compressed_len
 
-    if hasattr(output, "read"):
+    # cramjam.File doesn't expose the buffer protocol
+    if isinstance(output, cramjam.File):
         output.seek(0)
         output = output.read()
-    elif hasattr(output, "tobytes"):
-        output = output.tobytes()
-    else:
-        output = bytes(output)
     assert same_same(output, compressed)
 
 
-@pytest.mark.parametrize(
-    "input_type", (bytes, bytearray, "numpy", cramjam.Buffer, cramjam.File, memoryview)
-)
-@pytest.mark.parametrize(
-    "output_type", (bytes, bytearray, "numpy", cramjam.Buffer, cramjam.File, memoryview)
-)
+@pytest.mark.parametrize("input_type,output_type", INTO_TYPE_PAIRS)
 @pytest.mark.parametrize("variant_str", VARIANTS)
-@given(raw_data=st.binary())
+@given(raw_data=INTO_PAYLOADS)
 def test_variants_decompress_into(
-    variant_str, input_type, output_type, tmp_path_factory, raw_data, is_pypy
+    variant_str, input_type, output_type, scratch_file, raw_data
 ):
     variant = getattr(cramjam, variant_str)
 
-    compressed = variant.compress(raw_data)
+    compressed = compressed_bytes(variant_str, raw_data)
 
     # Setup input
     if input_type == "numpy":
         input = np.frombuffer(compressed, dtype=np.uint8)
     elif input_type == cramjam.File:
-        path = tmp_path_factory.mktemp("tmp").joinpath("input.txt")
-        path.touch()
-        input = cramjam.File(str(path))
+        input = scratch_file("input")
         input.write(compressed)
         input.seek(0)
     elif input_type == cramjam.Buffer:
@@ -187,32 +261,28 @@ def test_variants_decompress_into(
     if output_type == "numpy":
         output = np.zeros(len(raw_data), dtype=np.uint8)
     elif output_type == cramjam.File:
-        path = tmp_path_factory.mktemp("tmp").joinpath("output.txt")
-        path.touch()
-        output = cramjam.File(str(path))
+        output = scratch_file("output")
     elif output_type == cramjam.Buffer:
         output = cramjam.Buffer()
+    elif output_type == bytearray:
+        output = bytearray(len(raw_data))
     else:
-        output = output_type(b"0" * len(raw_data))
-
-    if is_pypy and isinstance(output, (bytes, memoryview)):
-        pytest.xfail(reason="PyPy de/compress_into w/ bytes or memoryview is a bit flaky behavior")
+        # Not b"0" * n: for n == 1 that's CPython's cached single byte object, and
+        # writing into it would change b"0" for the rest of the process.
+        output = output_type(bytes(len(raw_data)))
 
     n_bytes = variant.decompress_into(input, output)
     assert n_bytes == len(raw_data)
 
-    if hasattr(output, "read"):
+    # cramjam.File doesn't expose the buffer protocol
+    if isinstance(output, cramjam.File):
         output.seek(0)
         output = output.read()
-    elif hasattr(output, "tobytes"):
-        output = output.tobytes()
-    else:
-        output = bytes(output)
     assert same_same(output, raw_data)
 
 
-@given(data=st.binary())
-def test_variant_snappy_raw_into(data):
+@given(data=RAW_INTO_PAYLOADS)
+def test_variant_snappy_raw_into(data, scratch):
     """
     A little more special than other de/compress_into variants, as the underlying
     snappy raw api makes a hard expectation that its calculated len is used.
@@ -220,21 +290,21 @@ def test_variant_snappy_raw_into(data):
 
     compressed = cramjam.snappy.compress_raw(data)
     compressed_size = cramjam.snappy.compress_raw_max_len(data)
-    compressed_buffer = np.zeros(compressed_size, dtype=np.uint8)
+    compressed_buffer = scratch[0][:compressed_size]
     n_bytes = cramjam.snappy.compress_raw_into(data, compressed_buffer)
     assert n_bytes == len(compressed)
 
-    decompressed_buffer = np.zeros(len(data), dtype=np.uint8)
+    decompressed_buffer = scratch[1][:len(data)]
     n_bytes = cramjam.snappy.decompress_raw_into(
-        compressed_buffer[:n_bytes].tobytes(), decompressed_buffer
+        compressed_buffer[:n_bytes], decompressed_buffer
     )
     assert n_bytes == len(data)
 
     assert same_same(decompressed_buffer[:n_bytes], data)
 
 
-@given(data=st.binary())
-def test_variant_lz4_block_into(data):
+@given(data=RAW_INTO_PAYLOADS)
+def test_variant_lz4_block_into(data, scratch):
     """
     A little more special than other de/compress_into variants, as the underlying
     snappy raw api makes a hard expectation that its calculated len is used.
@@ -242,14 +312,14 @@ def test_variant_lz4_block_into(data):
 
     compressed = cramjam.lz4.compress_block(data)
     compressed_size = cramjam.lz4.compress_block_bound(data)
-    compressed_buffer = np.zeros(compressed_size, dtype=np.uint8)
+    compressed_buffer = scratch[0][:compressed_size]
     n_bytes = cramjam.lz4.compress_block_into(data, compressed_buffer)
     assert n_bytes == len(compressed)
     assert same_same(compressed, compressed_buffer[:n_bytes])
 
-    decompressed_buffer = np.zeros(len(data), dtype=np.uint8)
+    decompressed_buffer = scratch[1][:len(data)]
     n_bytes = cramjam.lz4.decompress_block_into(
-        compressed_buffer[:n_bytes].tobytes(), decompressed_buffer
+        compressed_buffer[:n_bytes], decompressed_buffer
     )
     assert n_bytes == len(data)
 
@@ -258,10 +328,9 @@ def test_variant_lz4_block_into(data):
 
 @pytest.mark.parametrize("Obj", (cramjam.File, cramjam.Buffer))
 @given(data=st.binary())
-def test_dunders(Obj, tmp_path_factory, data):
+def test_dunders(Obj, tmp_dir, data):
     if Obj == cramjam.File:
-        path = tmp_path_factory.mktemp("tmp").joinpath("tmp.txt")
-        path.touch()
+        path = tmp_dir.joinpath(f"tmp-{uuid.uuid4().hex}.txt")
         obj = Obj(str(path))
     else:
         obj = Obj()
@@ -304,29 +373,30 @@ def test_lz4_block(compress_kwargs):
         lz4.compress_block(data, **compress_kwargs),
         output_len=len(data) if not compress_kwargs["store_size"] else None,
     )
-    assert same_same(bytes(out), data)
+    assert same_same(out, data)
 
 
 @given(first=st.binary(), second=st.binary())
 def test_gzip_multiple_streams(first: bytes, second: bytes):
-    out1 = gzip.compress(first)
-    out2 = gzip.compress(second)
-    assert gzip.decompress(out1 + out2) == first + second
+    expected = first + second
+
+    streams = bytearray(gzip.compress(first))
+    streams += gzip.compress(second)
+    assert gzip.decompress(streams) == expected
 
     # works with data compressed by std gzip lib
-    out = bytes(cramjam.gzip.decompress(out1 + out2))
-    assert out == first + second
+    out = bytes(cramjam.gzip.decompress(streams))
+    assert out == expected
 
     # works with data compressed by cramjam
-    o1 = bytes(cramjam.gzip.compress(first))
-    o2 = bytes(cramjam.gzip.compress(second))
-    out = bytes(cramjam.gzip.decompress(o1 + o2))
-    assert same_same(out, first + second)
+    streams = bytearray(cramjam.gzip.compress(first))
+    streams += cramjam.gzip.compress(second)
+    out = cramjam.gzip.decompress(streams)
+    assert same_same(out, expected)
 
 
-@pytest.mark.parametrize(
-    "mod",
-    (
+def stream_compressor_cases():
+    mods = (
         cramjam.brotli,
         cramjam.bzip2,
         cramjam.deflate,
@@ -334,21 +404,30 @@ def test_gzip_multiple_streams(first: bytes, second: bytes):
         cramjam.lz4,
         cramjam.snappy,
         cramjam.zstd,
-    ),
-)
+    )
+    for mod in mods:
+        # snappy doesn't take a compression level
+        for level in (None,) if mod is cramjam.snappy else (None, 1, 6):
+            # brotli defaults to level 11, by far its slowest setting
+            marks = pytest.mark.slow if mod is cramjam.brotli and level is None else ()
+            yield pytest.param(mod, level, marks=marks, id=f"{mod.__name__.split('.')[-1]}-{level}")
+
+
+@pytest.mark.parametrize("mod,level", list(stream_compressor_cases()))
 @given(first=st.binary(), second=st.binary())
-def test_streams_compressor(mod, first: bytes, second: bytes):
-    compressor = mod.Compressor()
+def test_streams_compressor(mod, level, first: bytes, second: bytes):
+    compressor = mod.Compressor() if level is None else mod.Compressor(level=level)
 
+    out = bytearray()
     compressor.compress(first)
-    out = bytes(compressor.flush())
+    out.extend(compressor.flush())
 
     compressor.compress(second)
-    out += bytes(compressor.flush())
+    out.extend(compressor.flush())
 
-    out += bytes(compressor.finish())
+    out.extend(compressor.finish())
     decompressed = mod.decompress(out)
-    assert same_same(bytes(decompressed), first + second)
+    assert same_same(decompressed, first + second)
 
     # just empty bytes after the first .finish()
     # same behavior as brotli.Compressor()
@@ -367,12 +446,12 @@ def test_variants_stream_decompressors(variant_str):
 
     compressed = variant.compress(b"bytes")
     for _ in range(2):
-        n_bytes = decompressor.decompress(bytes(compressed))
+        n_bytes = decompressor.decompress(compressed)
         assert n_bytes == 5
     assert bytes(decompressor.flush()) == b"bytesbytes"
     assert bytes(decompressor.flush()) == b""
 
-    decompressor.decompress(bytes(compressed))
+    decompressor.decompress(compressed)
     assert bytes(decompressor.finish()) == b"bytes"
 
     # Calling .finish renders decompressor unusable after. (API consistency with other libs)